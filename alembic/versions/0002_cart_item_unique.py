@@ -0,0 +1,47 @@
+"""one cart_items row per (cart, product)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fold duplicate rows into the oldest one (summing quantities) before adding the constraint
+    op.execute("""
+        UPDATE cart_items ci SET quantity = d.total
+        FROM (
+            SELECT MIN(id) AS keep_id, SUM(quantity) AS total
+            FROM cart_items
+            WHERE cart_id IS NOT NULL AND product_id IS NOT NULL
+            GROUP BY cart_id, product_id
+            HAVING COUNT(*) > 1
+        ) d
+        WHERE ci.id = d.keep_id
+    """)
+    op.execute("""
+        DELETE FROM cart_items ci
+        USING (
+            SELECT cart_id, product_id, MIN(id) AS keep_id
+            FROM cart_items
+            WHERE cart_id IS NOT NULL AND product_id IS NOT NULL
+            GROUP BY cart_id, product_id
+            HAVING COUNT(*) > 1
+        ) d
+        WHERE ci.cart_id = d.cart_id AND ci.product_id = d.product_id AND ci.id <> d.keep_id
+    """)
+    op.create_unique_constraint("uq_cartitem", "cart_items", ["cart_id", "product_id"])
+
+
+def downgrade():
+    op.drop_constraint("uq_cartitem", "cart_items", type_="unique")
@@ -0,0 +1,75 @@
+"""one cart per user, index for product filter/sort
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-15 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Merge duplicate carts per user into the oldest one before making user_id unique:
+    # move their items over, fold duplicate (cart, product) rows, then drop the extra carts
+    op.drop_constraint("uq_cartitem", "cart_items", type_="unique")
+    op.execute("""
+        UPDATE cart_items ci SET cart_id = k.keep_id
+        FROM (
+            SELECT id, MIN(id) OVER (PARTITION BY user_id) AS keep_id
+            FROM carts
+            WHERE user_id IS NOT NULL
+        ) k
+        WHERE ci.cart_id = k.id AND k.id <> k.keep_id
+    """)
+    op.execute("""
+        UPDATE cart_items ci SET quantity = d.total
+        FROM (
+            SELECT MIN(id) AS keep_id, SUM(quantity) AS total
+            FROM cart_items
+            WHERE cart_id IS NOT NULL AND product_id IS NOT NULL
+            GROUP BY cart_id, product_id
+            HAVING COUNT(*) > 1
+        ) d
+        WHERE ci.id = d.keep_id
+    """)
+    op.execute("""
+        DELETE FROM cart_items ci
+        USING (
+            SELECT cart_id, product_id, MIN(id) AS keep_id
+            FROM cart_items
+            WHERE cart_id IS NOT NULL AND product_id IS NOT NULL
+            GROUP BY cart_id, product_id
+            HAVING COUNT(*) > 1
+        ) d
+        WHERE ci.cart_id = d.cart_id AND ci.product_id = d.product_id AND ci.id <> d.keep_id
+    """)
+    op.execute("""
+        DELETE FROM carts c
+        USING (
+            SELECT user_id, MIN(id) AS keep_id
+            FROM carts
+            WHERE user_id IS NOT NULL
+            GROUP BY user_id
+        ) k
+        WHERE c.user_id = k.user_id AND c.id <> k.keep_id
+    """)
+    op.create_unique_constraint("uq_cartitem", "cart_items", ["cart_id", "product_id"])
+    op.create_index("ix_cart_user_id", "carts", ["user_id"], unique=True)
+
+    # The composite index has category as its prefix, so the single-column one is redundant
+    op.drop_index("ix_products_category", table_name="products")
+    op.create_index("ix_product_category_price", "products", ["category", "price"])
+
+
+def downgrade():
+    op.drop_index("ix_product_category_price", table_name="products")
+    op.create_index("ix_products_category", "products", ["category"])
+    op.drop_index("ix_cart_user_id", table_name="carts")
@@ -1,4 +1,6 @@
 # app/auth.py
+import os
+import asyncio
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -13,19 +15,20 @@ SECRET_KEY = "supersecretkeymowa"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Password Hasher
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password Hasher (cost tunable via env, existing hashes verify at any cost)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # Token retrieve cheyadaniki route
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-# 1. Password Verify Cheyyadam
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# 1. Password Verify Cheyyadam (bcrypt is CPU heavy, run it off the event loop)
+async def verify_password(plain_password, hashed_password):
+    return await asyncio.to_thread(pwd_context.verify, plain_password, hashed_password)
 
 # 2. Password Hash Cheyyadam
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    return await asyncio.to_thread(pwd_context.hash, password)
 
 # 3. Token Create Cheyyadam
 def create_access_token(data: dict):
@@ -46,9 +49,10 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         role: str = payload.get("role")
-        if email is None:
+        user_id: int = payload.get("uid")
+        if email is None or user_id is None:
             raise credentials_exception
-        token_data = schemas.TokenData(email=email, role=role)
+        token_data = schemas.TokenData(email=email, role=role, user_id=user_id)
     except JWTError:
         raise credentials_exception
     return token_data
\ No newline at end of file
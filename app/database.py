@@ -1,10 +1,24 @@
+import asyncio
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+asyncpg://user:password@db/ecommerce")
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Connection pool (reuse TCP connections instead of reconnecting under load)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=True,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
+    pool_timeout=10,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+)
 
 SessionLocal = sessionmaker(
     bind=engine,
@@ -16,4 +30,11 @@ Base = declarative_base()
 
 async def get_db():
     async with SessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def warm_pool(size: int = POOL_SIZE):
+    # Open `size` connections up front so first requests don't pay the handshake
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    await asyncio.gather(*(ping() for _ in range(size)))
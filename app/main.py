@@ -1,30 +1,53 @@
-import json
-import redis
+import os
+import asyncio
+import orjson
+import msgpack
+import hashlib
+import hmac
+import redis.asyncio as aioredis
 from typing import List, Optional
-from fastapi import FastAPI, Depends, HTTPException, status, Query
+from fastapi import FastAPI, Depends, HTTPException, status, Query, Header, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import update, delete
+from sqlalchemy import insert, update, delete, case, tuple_, bindparam
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import selectinload, raiseload
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 
 # Local imports
-from .database import engine, Base, get_db
+from .database import SessionLocal, get_db, warm_pool
 from . import models, schemas, auth
 from .worker import send_order_email
 
 app = FastAPI(title="E-Commerce API")
 
-# Redis
-cache = redis.Redis(host='redis', port=6379, db=0, decode_responses=True)
+# Redis (async client, module-level connection pool shared by all requests)
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+cache = aioredis.from_url(REDIS_URL, max_connections=50)
+
+# Product list keys embed a generation number; a write bumps it so every cached
+# variant is skipped at once (old entries just age out via their TTL)
+PRODUCTS_CACHE_GEN = "products:gen"
+
+# Read the generation and the matching cache entry in one round trip
+_get_products_cache = cache.register_script("""
+local gen = redis.call('GET', KEYS[1]) or '0'
+return {gen, redis.call('GET', 'products:' .. gen .. ':' .. ARGV[1])}
+""")
+
+async def invalidate_products_cache():
+    await cache.incr(PRODUCTS_CACHE_GEN)
 
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        # Caution: In real prod, use Alembic migrations. 
-        # Here we rely on create_all to add new tables.
-        await conn.run_sync(Base.metadata.create_all)
+    # Schema is managed by Alembic (`alembic upgrade head` runs before the server starts),
+    # so startup only opens pool connections with a SELECT 1.
+    await warm_pool()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await cache.aclose()
 
 # --- AUTH ---
 @app.post("/register", response_model=schemas.Token)
@@ -32,21 +55,61 @@ async def register(user: schemas.UserCreate, db: AsyncSession = Depends(get_db))
     result = await db.execute(select(models.User).where(models.User.email == user.email))
     if result.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_pwd = auth.get_password_hash(user.password)
-    new_user = models.User(email=user.email, hashed_password=hashed_pwd, role=user.role.value)
-    db.add(new_user)
+    hashed_pwd = await auth.get_password_hash(user.password)
+    # INSERT ... RETURNING gives back the new row without a refresh() SELECT
+    result = await db.execute(
+        insert(models.User)
+        .values(email=user.email, hashed_password=hashed_pwd, role=user.role.value)
+        .returning(models.User)
+    )
+    new_user = result.scalar_one()
     await db.commit()
-    await db.refresh(new_user)
-    access_token = auth.create_access_token(data={"sub": new_user.email, "role": new_user.role})
+    access_token = auth.create_access_token(data={"sub": new_user.email, "role": new_user.role, "uid": new_user.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
+# Login throttling: after too many failures per (ip, email), reject before touching bcrypt
+LOGIN_MAX_FAILURES = 10
+LOGIN_FAIL_WINDOW = 60
+# A verified (hash, password) pair is remembered briefly so rapid re-logins skip bcrypt
+PASSWORD_OK_TTL = 30
+
+async def _check_password(plain_password: str, hashed_password: str) -> bool:
+    ok_key = "pwok:" + hmac.new(
+        auth.SECRET_KEY.encode(), f"{hashed_password}:{plain_password}".encode(), hashlib.sha256
+    ).hexdigest()
+    try:
+        if await cache.get(ok_key): return True
+    except Exception: pass
+    if not await auth.verify_password(plain_password, hashed_password):
+        return False
+    try: await cache.set(ok_key, 1, ex=PASSWORD_OK_TTL)
+    except Exception: pass
+    return True
+
 @app.post("/login", response_model=schemas.Token)
-async def login(user_credentials: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+async def login(request: Request, user_credentials: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    client_ip = request.client.host if request.client else "unknown"
+    fail_key = f"loginfail:{client_ip}:{user_credentials.username}"
+    # Count the attempt up front (INCR is atomic), so a parallel burst can't all slip past the check
+    attempts = 0
+    try:
+        async with cache.pipeline() as pipe:
+            pipe.incr(fail_key)
+            pipe.expire(fail_key, LOGIN_FAIL_WINDOW)
+            attempts, _ = await pipe.execute()
+    except Exception: pass
+    if attempts > LOGIN_MAX_FAILURES:
+        raise HTTPException(status_code=429, detail="Too many failed login attempts. Try again later.")
+
     result = await db.execute(select(models.User).where(models.User.email == user_credentials.username))
     user = result.scalar_one_or_none()
-    if not user or not auth.verify_password(user_credentials.password, user.hashed_password):
+    if not user or not await _check_password(user_credentials.password, user.hashed_password):
         raise HTTPException(status_code=403, detail="Invalid Credentials")
-    access_token = auth.create_access_token(data={"sub": user.email, "role": user.role})
+
+    # Successful login: forget the attempts
+    try: await cache.delete(fail_key)
+    except Exception: pass
+    access_token = auth.create_access_token(data={"sub": user.email, "role": user.role, "uid": user.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
 # --- PRODUCTS (Updated with Filter & Sort) ---
@@ -54,115 +117,291 @@ async def login(user_credentials: OAuth2PasswordRequestForm = Depends(), db: Asy
 async def create_product(product: schemas.ProductCreate, db: AsyncSession = Depends(get_db), current_user: schemas.TokenData = Depends(auth.get_current_user)):
     if current_user.role != "ADMIN":
         raise HTTPException(status_code=403, detail="Only Admins can add products")
-    new_product = models.Product(**product.dict())
-    db.add(new_product)
+    result = await db.execute(insert(models.Product).values(**product.dict()).returning(models.Product))
+    new_product = result.scalar_one()
     await db.commit()
-    await db.refresh(new_product)
-    try: cache.delete("products_list")
-    except: pass
+    try: await invalidate_products_cache()
+    except Exception: pass
     return new_product
 
-@app.get("/products", response_model=List[schemas.ProductOut])
-async def get_products(
-    category: Optional[str] = None,
-    sort_by_price: Optional[str] = Query(None, regex="^(asc|desc)$"),
-    db: AsyncSession = Depends(get_db)
-):
-    # Note: Caching logic complicated by filters, skipping cache if filters present for simplicity
-    if not category and not sort_by_price:
+# Cache stampede protection for GET /products. Only the lock holder queries the DB; it keeps
+# renewing the lock while the rebuild runs. Waiters poll until PRODUCTS_WAIT_DEADLINE, then
+# serve the previous generation's copy or a 503 instead of piling onto Postgres.
+PRODUCTS_LOCK_TTL = 5
+PRODUCTS_LOCK_WAIT = 0.05
+PRODUCTS_WAIT_DEADLINE = 10
+
+# Only touch the lock if it still holds our token (it may have expired and been retaken)
+_release_lock = cache.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+""")
+
+_extend_lock = cache.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+""")
+
+async def _keep_lock(lock_key: str, token: str):
+    while True:
+        await asyncio.sleep(PRODUCTS_LOCK_TTL / 2)
         try:
-            cached = cache.get("products_list")
-            if cached: return json.loads(cached)
-        except: pass
-
+            if not await _extend_lock(keys=[lock_key], args=[token, PRODUCTS_LOCK_TTL * 1000]):
+                return
+        except Exception:
+            return
+
+# Product lists are cached already encoded in the format the client negotiated, so a hit is
+# served straight from Redis. MessagePack is positional ({"fields": [...], "rows": [[...]]})
+# so field names aren't repeated per row.
+PRODUCT_FIELDS = ("id", "name", "category", "price", "stock_quantity", "version")
+PRODUCT_MEDIA_TYPES = ("application/json", "application/x-ndjson", "application/msgpack")
+
+def _product_row(product) -> dict:
+    # Same row shape (fields and order) for JSON, NDJSON and MessagePack
+    return {f: getattr(product, f) for f in PRODUCT_FIELDS}
+
+def _encode_products(products, media_type: str) -> bytes:
+    if media_type == "application/msgpack":
+        return msgpack.packb({
+            "fields": PRODUCT_FIELDS,
+            "rows": [list(_product_row(p).values()) for p in products],
+        })
+    return orjson.dumps([_product_row(p) for p in products])
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # RFC 7232 weak comparison: W/ prefixes are ignored and "*" matches any current body
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+def _preferred_media_type(accept: Optional[str], offers) -> str:
+    # Highest q wins, exact type beats type/* beats */*; ties and no match fall back to offers[0]
+    if not accept:
+        return offers[0]
+    ranges = {}
+    for part in accept.split(","):
+        media, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try: q = float(value)
+                except ValueError: q = 0.0
+        ranges.setdefault(media.lower(), q)
+
+    def score(offer):
+        for specificity, pattern in ((2, offer), (1, offer.split("/")[0] + "/*"), (0, "*/*")):
+            if pattern in ranges:
+                return (ranges[pattern], specificity)
+        return (0.0, 0)
+
+    best = max(offers, key=score)
+    return best if score(best)[0] > 0 else offers[0]
+
+# Every filter/sort variant is built once at import; category comes in as a bind param
+def _product_query(sort_by_price: Optional[str], filtered: bool):
     query = select(models.Product)
-    
     # 🔥 FILTERING
-    if category:
-        query = query.where(models.Product.category == category)
-    
+    if filtered:
+        query = query.where(models.Product.category == bindparam("category"))
     # 🔥 SORTING
     if sort_by_price == "asc":
         query = query.order_by(models.Product.price.asc())
     elif sort_by_price == "desc":
         query = query.order_by(models.Product.price.desc())
-
-    result = await db.execute(query)
-    products = result.scalars().all()
-
-    # Only cache if no filters applied
-    if not category and not sort_by_price:
+    return query
+
+PRODUCT_QUERIES = {
+    (sort, filtered): _product_query(sort, filtered)
+    for sort in (None, "asc", "desc")
+    for filtered in (False, True)
+}
+
+@app.get(
+    "/products",
+    response_class=Response,
+    responses={200: {
+        "model": List[schemas.ProductOut],
+        "content": {"application/x-ndjson": {}, "application/msgpack": {}},
+    }},
+)
+async def get_products(
+    category: Optional[str] = None,
+    sort_by_price: Optional[str] = Query(None, regex="^(asc|desc)$"),
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    query = PRODUCT_QUERIES[(sort_by_price, bool(category))]
+    params = {"category": category} if category else {}
+
+    media_type = _preferred_media_type(accept, PRODUCT_MEDIA_TYPES)
+
+    # 🔥 STREAMING (opt-in): one JSON object per line, rows never buffered as a whole list
+    if media_type == "application/x-ndjson":
+        async def stream_products():
+            # Own session: the request-scoped one may be closed before streaming ends
+            async with SessionLocal() as session:
+                async for product in await session.stream_scalars(query, params):
+                    yield orjson.dumps(_product_row(product)) + b"\n"
+        return StreamingResponse(stream_products(), media_type="application/x-ndjson", headers={"Vary": "Accept"})
+
+    body = None
+
+    # Each format/filter/sort combination gets its own cache entry within the current generation
+    variant = f"{media_type}:{category or ''}:{sort_by_price or ''}"
+    cache_key = None
+    try:
+        gen, body = await _get_products_cache(keys=[PRODUCTS_CACHE_GEN], args=[variant])
+        gen = int(gen)
+        cache_key = f"products:{gen}:{variant}"
+    except Exception: pass
+
+    # 🔥 SINGLE-FLIGHT: on a miss only the lock holder rebuilds, the rest wait for its result
+    lock_key = f"lock:{cache_key}"
+    lock_token = None
+    if body is None and cache_key:
+        token = os.urandom(16).hex()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + PRODUCTS_WAIT_DEADLINE
         try:
-            cache.set("products_list", json.dumps(jsonable_encoder(products)), ex=600)
-        except: pass
-        
-    return products
+            while True:
+                if await cache.set(lock_key, token, nx=True, ex=PRODUCTS_LOCK_TTL):
+                    lock_token = token
+                    break
+                if loop.time() >= deadline:
+                    break
+                await asyncio.sleep(PRODUCTS_LOCK_WAIT)
+                body = await cache.get(cache_key)
+                if body is not None:
+                    break
+        except Exception:
+            # Redis went away mid-wait: behave like a cache outage
+            cache_key = None
+
+        if body is None and lock_token is None and cache_key:
+            # Someone else is still rebuilding: previous generation's copy (if any) or 503
+            try: body = await cache.get(f"products:{gen - 1}:{variant}") if gen else None
+            except Exception: pass
+            if body is None:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Product list is being rebuilt, please retry",
+                    headers={"Retry-After": "1"},
+                )
+
+    # Still nothing: we hold the lock (or Redis is unavailable), build from the DB
+    if body is None:
+        renewer = asyncio.create_task(_keep_lock(lock_key, lock_token)) if lock_token else None
+        try:
+            result = await db.execute(query, params)
+            products = result.scalars().all()
+            body = _encode_products(products, media_type)
+
+            if cache_key:
+                try: await cache.set(cache_key, body, ex=600)
+                except Exception: pass
+        finally:
+            if renewer:
+                renewer.cancel()
+            if lock_token:
+                try: await _release_lock(keys=[lock_key], args=[lock_token])
+                except Exception: pass
+
+    # 🔥 CONDITIONAL GET (ETag)
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    # Body depends on Accept (JSON / NDJSON / MessagePack), so shared caches must key on it
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=60", "Vary": "Accept"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(body, media_type=media_type, headers=headers)
 
 # --- CART ROUTES (NEW) ---
+async def _load_cart(db: AsyncSession, user_id: int):
+    # Cart + Items + Products in one go; anything else raises instead of lazy loading
+    stmt = (
+        select(models.Cart)
+        .where(models.Cart.user_id == user_id)
+        .options(
+            selectinload(models.Cart.items).selectinload(models.CartItem.product),
+            raiseload("*"),
+        )
+    )
+    res = await db.execute(stmt)
+    return res.scalar_one_or_none()
+
 @app.post("/cart/items", response_model=schemas.CartOut)
 async def add_to_cart(
-    item: schemas.CartItemAdd, 
+    item: schemas.CartItemAdd,
     db: AsyncSession = Depends(get_db),
     current_user: schemas.TokenData = Depends(auth.get_current_user)
 ):
-    # Get User
-    result = await db.execute(select(models.User).where(models.User.email == current_user.email))
-    user = result.scalar_one()
+    # Get or Create Cart (only the id is needed here)
+    res = await db.execute(select(models.Cart.id).where(models.Cart.user_id == current_user.user_id))
+    cart_id = res.scalar_one_or_none()
+    if cart_id is None:
+        # Concurrent first adds race here: the unique user_id index lets only one insert win
+        res = await db.execute(
+            pg_insert(models.Cart)
+            .values(user_id=current_user.user_id)
+            .on_conflict_do_nothing(index_elements=[models.Cart.user_id])
+            .returning(models.Cart.id)
+        )
+        cart_id = res.scalar_one_or_none()
+        if cart_id is None:
+            res = await db.execute(select(models.Cart.id).where(models.Cart.user_id == current_user.user_id))
+            cart_id = res.scalar_one()
+
+    # Insert item or bump its quantity atomically (one round trip, no race between clicks)
+    stmt = pg_insert(models.CartItem).values(cart_id=cart_id, product_id=item.product_id, quantity=item.quantity)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.CartItem.cart_id, models.CartItem.product_id],
+        set_={"quantity": models.CartItem.quantity + stmt.excluded.quantity},
+    )
+    await db.execute(stmt)
 
-    # Get or Create Cart
-    res = await db.execute(select(models.Cart).where(models.Cart.user_id == user.id))
-    cart = res.scalar_one_or_none()
-    if not cart:
-        cart = models.Cart(user_id=user.id)
-        db.add(cart)
-        await db.commit()
-        await db.refresh(cart)
-
-    # Check if item exists in cart
-    res = await db.execute(select(models.CartItem).where(models.CartItem.cart_id == cart.id, models.CartItem.product_id == item.product_id))
-    existing_item = res.scalar_one_or_none()
-
-    if existing_item:
-        existing_item.quantity += item.quantity
-    else:
-        new_item = models.CartItem(cart_id=cart.id, product_id=item.product_id, quantity=item.quantity)
-        db.add(new_item)
-    
     await db.commit()
-    
+
     # Return full cart
-    stmt = select(models.Cart).where(models.Cart.id == cart.id).options(selectinload(models.Cart.items).selectinload(models.CartItem.product))
+    stmt = (
+        select(models.Cart)
+        .where(models.Cart.id == cart_id)
+        .options(selectinload(models.Cart.items).selectinload(models.CartItem.product))
+        .execution_options(populate_existing=True)
+    )
     res = await db.execute(stmt)
     return res.scalar_one()
 
 @app.get("/cart", response_model=schemas.CartOut)
 async def view_cart(db: AsyncSession = Depends(get_db), current_user: schemas.TokenData = Depends(auth.get_current_user)):
-    result = await db.execute(select(models.User).where(models.User.email == current_user.email))
-    user = result.scalar_one()
+    cart = await _load_cart(db, current_user.user_id)
 
-    stmt = select(models.Cart).where(models.Cart.user_id == user.id).options(selectinload(models.Cart.items).selectinload(models.CartItem.product))
-    res = await db.execute(stmt)
-    cart = res.scalar_one_or_none()
-    
     if not cart:
         # Return empty temp cart structure if none exists
         return {"id": 0, "items": []}
-        
+
     return cart
 
 @app.delete("/cart/items/{product_id}")
 async def remove_from_cart(product_id: int, db: AsyncSession = Depends(get_db), current_user: schemas.TokenData = Depends(auth.get_current_user)):
-    result = await db.execute(select(models.User).where(models.User.email == current_user.email))
-    user = result.scalar_one()
-
-    # Find Cart
-    res = await db.execute(select(models.Cart).where(models.Cart.user_id == user.id))
-    cart = res.scalar_one_or_none()
-    if not cart:
+    # Find Cart (only the id is needed here)
+    res = await db.execute(select(models.Cart.id).where(models.Cart.user_id == current_user.user_id))
+    cart_id = res.scalar_one_or_none()
+    if cart_id is None:
         raise HTTPException(status_code=404, detail="Cart not found")
 
     # Delete Item
-    await db.execute(delete(models.CartItem).where(models.CartItem.cart_id == cart.id, models.CartItem.product_id == product_id))
+    await db.execute(delete(models.CartItem).where(models.CartItem.cart_id == cart_id, models.CartItem.product_id == product_id))
     await db.commit()
     return {"message": "Item removed"}
 
@@ -172,58 +411,66 @@ async def create_order_from_cart(
     db: AsyncSession = Depends(get_db),
     current_user: schemas.TokenData = Depends(auth.get_current_user)
 ):
-    # 1. Get User & Cart
-    user_res = await db.execute(select(models.User).where(models.User.email == current_user.email))
-    user = user_res.scalar_one()
-
-    cart_res = await db.execute(select(models.Cart).where(models.Cart.user_id == user.id).options(selectinload(models.Cart.items)))
-    cart = cart_res.scalar_one_or_none()
+    # 1. Get Cart (cart items come with their products)
+    cart = await _load_cart(db, current_user.user_id)
 
     if not cart or not cart.items:
         raise HTTPException(status_code=400, detail="Cart is empty")
 
     total_price = 0.0
-    
+
     # 2. Transaction Start
     try:
-        new_order = models.Order(user_id=user.id, total_price=0, status="PROCESSING")
-        db.add(new_order)
-        await db.flush()
+        res = await db.execute(
+            insert(models.Order)
+            .values(user_id=current_user.user_id, total_price=0, status="PROCESSING")
+            .returning(models.Order)
+        )
+        new_order = res.scalar_one()
+
+        # Products were batch-loaded with the cart (one IN query, no N+1)
+        products = {ci.product_id: ci.product for ci in cart.items if ci.product}
 
         # 3. Process Cart Items
+        order_items = []
+        qty_by_product = {}
         for cart_item in cart.items:
-            # Fetch Product
-            res = await db.execute(select(models.Product).where(models.Product.id == cart_item.product_id))
-            product = res.scalar_one_or_none()
+            product = products.get(cart_item.product_id)
 
             if not product:
                 raise HTTPException(status_code=404, detail=f"Product {cart_item.product_id} not found")
-            
-            if product.stock_quantity < cart_item.quantity:
-                raise HTTPException(status_code=400, detail=f"Out of stock: {product.name}")
-
-            # Optimistic Locking
-            stmt = (
-                update(models.Product)
-                .where(models.Product.id == product.id)
-                .where(models.Product.version == product.version)
-                .values(stock_quantity=models.Product.stock_quantity - cart_item.quantity, version=models.Product.version + 1)
-                .execution_options(synchronize_session="fetch")
-            )
-            update_result = await db.execute(stmt)
 
-            if update_result.rowcount == 0:
-                raise HTTPException(status_code=409, detail=f"Stock changed for {product.name}. Please retry.")
+            qty_by_product[product.id] = qty_by_product.get(product.id, 0) + cart_item.quantity
+            if product.stock_quantity < qty_by_product[product.id]:
+                raise HTTPException(status_code=400, detail=f"Out of stock: {product.name}")
 
-            order_item = models.OrderItem(
+            order_items.append(models.OrderItem(
                 order_id=new_order.id, 
                 product_id=product.id, 
                 quantity=cart_item.quantity, 
                 price_at_purchase=product.price
-            )
-            db.add(order_item)
+            ))
             total_price += product.price * cart_item.quantity
 
+        # Optimistic Locking (one UPDATE for all products, matched on (id, version))
+        stmt = (
+            update(models.Product)
+            .where(tuple_(models.Product.id, models.Product.version).in_(
+                [(pid, products[pid].version) for pid in qty_by_product]
+            ))
+            .values(
+                stock_quantity=models.Product.stock_quantity - case(qty_by_product, value=models.Product.id),
+                version=models.Product.version + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        update_result = await db.execute(stmt)
+
+        if update_result.rowcount != len(qty_by_product):
+            raise HTTPException(status_code=409, detail="Stock changed for one or more products. Please retry.")
+
+        db.add_all(order_items)
+
         # 4. Finalize
         new_order.total_price = total_price
         new_order.status = "CONFIRMED"
@@ -232,13 +479,13 @@ async def create_order_from_cart(
         await db.execute(delete(models.CartItem).where(models.CartItem.cart_id == cart.id))
 
         await db.commit()
-        await db.refresh(new_order)
         
         # Async Task
         try:
-            cache.delete("products_list")
-            send_order_email.delay(user.email, new_order.id)
-        except: pass
+            await invalidate_products_cache()
+            # Celery publish is blocking, run it off the event loop
+            await asyncio.to_thread(send_order_email.delay, current_user.email, new_order.id)
+        except Exception: pass
             
         return new_order
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 import enum
@@ -19,15 +19,19 @@ class User(Base):
 
 class Product(Base):
     __tablename__ = "products"
+    # Serves category filter + price sort in GET /products (also covers category-only lookups)
+    __table_args__ = (Index("ix_product_category_price", "category", "price"),)
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
-    category = Column(String, index=True, default="General") # 🔥 NEW: Category
+    category = Column(String, default="General") # 🔥 NEW: Category
     price = Column(Float)
     stock_quantity = Column(Integer)
     version = Column(Integer, default=1)
 
 class Cart(Base): # 🔥 NEW TABLE
     __tablename__ = "carts"
+    # One cart per user (User.cart is uselist=False; target of the add_to_cart upsert)
+    __table_args__ = (Index("ix_cart_user_id", "user_id", unique=True),)
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     user = relationship("User", back_populates="cart")
@@ -35,6 +39,8 @@ class Cart(Base): # 🔥 NEW TABLE
 
 class CartItem(Base): # 🔥 NEW TABLE
     __tablename__ = "cart_items"
+    # One row per product in a cart (target of the add_to_cart upsert)
+    __table_args__ = (UniqueConstraint("cart_id", "product_id", name="uq_cartitem"),)
     id = Column(Integer, primary_key=True, index=True)
     cart_id = Column(Integer, ForeignKey("carts.id"))
     product_id = Column(Integer, ForeignKey("products.id"))
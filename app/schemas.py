@@ -15,6 +15,7 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     email: Optional[str] = None
     role: Optional[str] = None
+    user_id: Optional[int] = None
 
 # --- PRODUCT ---
 class ProductBase(BaseModel):
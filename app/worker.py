@@ -8,6 +8,9 @@ CELERY_BROKER_URL = "redis://redis:6379/0"
 # Celery App Config
 celery = Celery(__name__, broker=CELERY_BROKER_URL, backend=CELERY_BROKER_URL)
 
+# Run with the gevent pool: `celery -A app.worker worker -P gevent -c 1000`
+# (-P gevent monkey-patches before this module loads, so time.sleep / smtplib yield
+# instead of blocking; no patching here because the API imports this module too)
 @celery.task(name="send_order_email")
 def send_order_email(email: str, order_id: int):
     # Simulate Email sending (Wait 5 seconds)